@@ -1,10 +1,14 @@
 import streamlit as st
-import hashlib
 import sqlite3
 import pandas as pd
 from datetime import datetime
 import time
+import os
+import tempfile
+import threading
 from io import BytesIO
+from pathlib import Path
+from password_hashing import hash_password, verify_password, needs_rehash, DUMMY_HASH
 
 # Set page title and icon
 st.set_page_config(
@@ -13,11 +17,31 @@ st.set_page_config(
     layout="wide"
 )
 
+# Database location (override with CREDIT_APP_DB, e.g. for load tests)
+DB_PATH = os.environ.get("CREDIT_APP_DB", "credit_app.db")
+
+def parse_snapshot_interval(value):
+    try:
+        interval = int(value)
+    except ValueError:
+        raise ValueError(f"CREDIT_APP_SNAPSHOT_INTERVAL must be a whole number of seconds, got {value!r}") from None
+    if interval < 1:
+        raise ValueError(f"CREDIT_APP_SNAPSHOT_INTERVAL must be at least 1 second, got {interval}")
+    return interval
+
+# Read-only reporting snapshot of DB_PATH, refreshed every SNAPSHOT_INTERVAL seconds
+REPORT_DB_PATH = os.environ.get("CREDIT_APP_REPORT_DB", os.path.splitext(DB_PATH)[0] + "_report.db")
+SNAPSHOT_INTERVAL = parse_snapshot_interval(os.environ.get("CREDIT_APP_SNAPSHOT_INTERVAL", "60"))
+
 # Initialize database
 def init_db():
-    conn = sqlite3.connect('credit_app.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
+    # WAL lets readers (including the snapshot backup) run alongside a writer,
+    # at the cost of -wal/-shm files next to the DB and needing a local disk
+    c.execute("PRAGMA journal_mode=WAL")
+    
     # Users table
     c.execute('''CREATE TABLE IF NOT EXISTS users
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -57,7 +81,7 @@ def init_db():
     # Add default admin user if not exists
     c.execute("SELECT COUNT(*) FROM users WHERE username = 'admin'")
     if c.fetchone()[0] == 0:
-        password_hash = hashlib.sha256("admin123".encode()).hexdigest()
+        password_hash = hash_password("admin123")
         c.execute("INSERT INTO users (username, password_hash, full_name, role) VALUES (?, ?, ?, ?)",
                   ('admin', password_hash, 'Administrator', 'admin'))
     
@@ -68,7 +92,64 @@ init_db()
 
 # Database helper functions
 def get_db_connection():
-    return sqlite3.connect('credit_app.db')
+    return sqlite3.connect(DB_PATH)
+
+# Reporting snapshot
+# Exports and reports read from a copy of the database so their long reads
+# never hold a shared lock on credit_app.db while officers are saving.
+def refresh_report_snapshot():
+    # Copy into a temp file and swap it in, so readers never see a partial copy
+    fd, tmp_path = tempfile.mkstemp(prefix="credit_app_report-", suffix=".db",
+                                    dir=os.path.dirname(os.path.abspath(REPORT_DB_PATH)))
+    os.close(fd)
+    try:
+        source = get_db_connection()
+        snapshot = sqlite3.connect(tmp_path)
+        try:
+            # UTC, like the CURRENT_TIMESTAMP columns it is shown next to
+            as_of = source.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+            # One step: the source is in WAL mode, so this read doesn't block
+            # save_assessment commits, and a stepped copy would restart on every
+            # write made while it runs
+            source.backup(snapshot)
+            # The copy inherits WAL mode; a rollback journal lets readers open it read-only
+            snapshot.execute("PRAGMA journal_mode=DELETE")
+            snapshot.execute("CREATE TABLE snapshot_info (as_of TIMESTAMP NOT NULL)")
+            snapshot.execute("INSERT INTO snapshot_info (as_of) VALUES (?)", (as_of,))
+            snapshot.commit()
+        finally:
+            snapshot.close()
+            source.close()
+        os.replace(tmp_path, REPORT_DB_PATH)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def snapshot_refresher():
+    while True:
+        time.sleep(SNAPSHOT_INTERVAL)
+        try:
+            refresh_report_snapshot()
+        except (sqlite3.Error, OSError):
+            pass  # Keep serving the last snapshot; its "as of" time shows the age
+
+@st.cache_resource
+def start_snapshot_refresher():
+    # One refresher thread per server process, shared by all sessions. Always
+    # start from a fresh snapshot rather than one left by a previous run.
+    refresh_report_snapshot()
+    thread = threading.Thread(target=snapshot_refresher, daemon=True)
+    thread.start()
+    return thread
+
+start_snapshot_refresher()
+
+def get_report_connection():
+    return sqlite3.connect(Path(REPORT_DB_PATH).resolve().as_uri() + "?mode=ro", uri=True)
+
+def get_snapshot_as_of(conn):
+    return conn.execute("SELECT as_of FROM snapshot_info").fetchone()[0]
 
 def log_audit_action(user_id, action, details=None):
     conn = get_db_connection()
@@ -79,12 +160,6 @@ def log_audit_action(user_id, action, details=None):
     conn.close()
 
 # Security functions
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def verify_password(password, hashed_password):
-    return hash_password(password) == hashed_password
-
 def verify_user(username, password):
     conn = get_db_connection()
     c = conn.cursor()
@@ -92,7 +167,19 @@ def verify_user(username, password):
     user_data = c.fetchone()
     conn.close()
     
-    if user_data and verify_password(password, user_data[2]):
+    if user_data is None:
+        verify_password(password, DUMMY_HASH)
+        return None
+    
+    if verify_password(password, user_data[2]):
+        # Upgrade legacy or outdated hashes now that we have the password
+        if needs_rehash(user_data[2]):
+            conn = get_db_connection()
+            c = conn.cursor()
+            c.execute("UPDATE users SET password_hash = ? WHERE id = ?",
+                      (hash_password(password), user_data[0]))
+            conn.commit()
+            conn.close()
         return {
             "id": user_data[0],
             "username": user_data[1],
@@ -311,8 +398,9 @@ def export_assessments():
     start_date_str = start_date.strftime('%Y-%m-%d')
     end_date_str = end_date.strftime('%Y-%m-%d')
     
-    # Get assessments data
-    conn = get_db_connection()
+    # Get assessments data from the reporting snapshot
+    conn = get_report_connection()
+    as_of = get_snapshot_as_of(conn)
     query = f"""
         SELECT a.customer_name, a.is_new_customer, a.credit_score, a.risk_category, 
                a.recommended_products, a.created_at, u.full_name as assessed_by
@@ -324,6 +412,8 @@ def export_assessments():
     assessments = pd.read_sql(query, conn)
     conn.close()
     
+    st.caption(f"Data as of {as_of} UTC")
+    
     if assessments.empty:
         st.warning("No assessments found for the selected date range.")
         return
@@ -357,7 +447,8 @@ def export_assessments():
 def view_audit_log():
     st.subheader("Audit Log")
     
-    conn = get_db_connection()
+    conn = get_report_connection()
+    as_of = get_snapshot_as_of(conn)
     audit_log = pd.read_sql("""
         SELECT l.timestamp, u.username, l.action, l.details 
         FROM audit_log l
@@ -367,6 +458,8 @@ def view_audit_log():
     """, conn)
     conn.close()
     
+    st.caption(f"Data as of {as_of} UTC")
+    
     if not audit_log.empty:
         st.dataframe(audit_log)
         
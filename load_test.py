@@ -0,0 +1,483 @@
+import argparse
+import atexit
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import connect
+
+# Load test harness: how many loan officers can one app.py.py process serve?
+# Starts one `streamlit run app.py.py` server on a local port and drives N
+# concurrent headless sessions against it over Streamlit's websocket protocol,
+# the way N browser tabs would. All sessions compete for the one server's
+# threads, GIL and database.
+#
+#   python load_test.py --users 10 --assessments 3
+#
+# Exits with status 1 when a metric regresses past its budget.
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(APP_DIR, "app.py.py")
+
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+# DB instrumentation (runs inside the server process)
+class WriteStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.locked_errors = 0
+
+    def record(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def record_locked_error(self):
+        with self.lock:
+            self.locked_errors += 1
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump({"write_latencies": self.latencies, "locked_errors": self.locked_errors}, f)
+
+
+write_stats = WriteStats()
+
+
+def timed_write(func, *args):
+    # Full duration of each write statement and commit: time spent queued
+    # behind other connections' locks plus the write and fsync themselves.
+    # Lock contention that outlasts the busy timeout shows up as locked errors.
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    except sqlite3.OperationalError as e:
+        if "locked" in str(e):
+            write_stats.record_locked_error()
+        raise
+    finally:
+        write_stats.record(time.perf_counter() - start)
+
+
+def is_write(sql):
+    return sql.lstrip().upper().startswith(WRITE_PREFIXES)
+
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, *args):
+        if is_write(sql):
+            return timed_write(super().execute, sql, *args)
+        return super().execute(sql, *args)
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, *args):
+        return self.cursor().execute(sql, *args)
+
+    def commit(self):
+        return timed_write(super().commit)
+
+
+def instrument_sqlite(db_path):
+    # Only the app database; the snapshot refresher's writes to its own copy
+    # are not on the officers' write path
+    original_connect = sqlite3.connect
+
+    def connect(database, *args, **kwargs):
+        if database == db_path:
+            kwargs.setdefault("factory", TimedConnection)
+        return original_connect(database, *args, **kwargs)
+
+    sqlite3.connect = connect
+
+
+def run_instrumented_server(stats_path, streamlit_args):
+    # Entry point of the server process: `streamlit run` with timed DB writes,
+    # dumped to stats_path when the server shuts down
+    from streamlit.web import cli
+
+    instrument_sqlite(os.environ["CREDIT_APP_DB"])
+    atexit.register(write_stats.dump, stats_path)
+    sys.argv = ["streamlit", "run", APP_FILE] + streamlit_args
+    cli.main()
+
+
+# Server control
+def free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, stats_path, log_file):
+    bootstrap = "import sys, load_test; load_test.run_instrumented_server(sys.argv[1], sys.argv[2:])"
+    return subprocess.Popen(
+        [sys.executable, "-c", bootstrap, stats_path,
+         "--server.headless", "true",
+         "--server.port", str(port),
+         "--server.address", "localhost",
+         "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false"],
+        cwd=APP_DIR, stdout=log_file, stderr=subprocess.STDOUT,
+    )
+
+
+def wait_for_server(server, base_url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with status {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server did not become healthy within {timeout} s")
+
+
+def stop_server(server, timeout):
+    server.terminate()
+    try:
+        server.wait(timeout)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+@contextmanager
+def app_server(port, stats_path, log_path, timeout):
+    # A running, warmed-up server; its log is echoed if anything fails
+    base_url = f"http://localhost:{port}"
+    with open(log_path, "w") as log_file:
+        server = start_server(port, stats_path, log_file)
+        try:
+            wait_for_server(server, base_url, timeout)
+            warm_up(base_url, timeout)
+            yield base_url
+        except Exception:
+            with open(log_path) as f:
+                sys.stderr.write(f.read())
+            raise
+        finally:
+            stop_server(server, timeout)
+
+
+# Simulated user
+class Session:
+    # One headless browser tab: sends widget states as BackMsgs and reads the
+    # ForwardMsgs of each script run until it finishes
+
+    def __init__(self, ws, base_url, timeout):
+        self.ws = ws
+        self.base_url = base_url
+        self.timeout = timeout
+        self.widgets = {}
+        self.states = {}
+        self.latencies = []
+
+    def find(self, label, element_type=None):
+        widget = self.widgets.get(label)
+        if widget is None or (element_type and widget[0] != element_type):
+            raise LookupError(f"No widget labelled {label!r}")
+        return widget[1]
+
+    def set_value(self, label, value):
+        # Text inputs, radios and selectboxes all send their value as a string
+        widget = self.find(label)
+        self.states[widget.id] = WidgetState(id=widget.id, string_value=value)
+
+    def run(self, *triggers):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        for state in list(self.states.values()) + list(triggers):
+            msg.rerun_script.widget_states.widgets.add().CopyFrom(state)
+
+        start = time.perf_counter()
+        self.ws.send(msg.SerializeToString())
+        error = self.read_until_finished()
+        self.latencies.append(time.perf_counter() - start)
+        if error:
+            raise RuntimeError(error)
+
+    def read_until_finished(self):
+        # A script that calls st.rerun() finishes early and runs again; the
+        # user waits for the whole chain
+        error = None
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(self.ws.recv(timeout=self.timeout))
+            msg_type = msg.WhichOneof("type")
+            if msg_type == "new_session":
+                self.widgets = {}
+                error = None
+            elif msg_type == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                element_type = element.WhichOneof("type")
+                proto = getattr(element, element_type)
+                if element_type == "exception":
+                    error = proto.message
+                elif getattr(proto, "id", "") and hasattr(proto, "label"):
+                    self.widgets[proto.label] = (element_type, proto)
+            elif msg_type == "script_finished":
+                if msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if msg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    return "Script failed to compile"
+                return error
+
+    def click(self, label):
+        widget = self.find(label)
+        self.run(WidgetState(id=widget.id, trigger_value=True))
+
+    def login(self, username, password, bad_logins):
+        self.run()
+        for _ in range(bad_logins):
+            self.set_value("Username", username)
+            self.set_value("Password", password + "-wrong")
+            self.click("Login")
+        self.set_value("Username", username)
+        self.set_value("Password", password)
+        self.click("Login")
+        if "Go to" not in self.widgets:
+            raise RuntimeError(f"Login failed for {username}")
+
+    def assessment(self, user_id, number):
+        self.set_value("Go to", "New Assessment")
+        self.run()
+        self.set_value("Enter Customer Name:", f"Load Test {user_id}-{number}")
+        self.set_value("Is the customer new?", "Yes" if number % 2 else "No")
+        self.click("Next")
+        for _ in range(2, 7):
+            self.click("Next")
+        self.click("Save Assessment")
+        self.click("Start New Assessment")
+
+    def export(self):
+        self.set_value("Go to", "View Assessments")
+        self.run()
+        self.set_value("Export Format", "CSV")
+        self.run()
+        # Fetch the file like the browser's download would
+        download = self.find("Download CSV", "download_button")
+        with urllib.request.urlopen(self.base_url + download.url, timeout=self.timeout) as response:
+            if not response.read():
+                raise RuntimeError("Empty CSV export")
+
+    def logout(self):
+        self.click("Logout")
+
+
+def stream_url(base_url):
+    return base_url.replace("http://", "ws://", 1) + "/_stcore/stream"
+
+
+def simulate_user(user_id, args, base_url, start_barrier):
+    latencies = []
+    started = time.time()
+    try:
+        with connect(stream_url(base_url), subprotocols=["streamlit"],
+                     max_size=None, open_timeout=args.timeout) as ws:
+            session = Session(ws, base_url, args.timeout)
+            latencies = session.latencies
+            # Start all users together so the sessions genuinely overlap
+            start_barrier.wait(args.timeout)
+            started = time.time()
+            session.login(args.username, args.password, args.bad_logins)
+            for number in range(args.assessments):
+                session.assessment(user_id, number)
+                session.export()
+            session.logout()
+        error = None
+    except Exception as e:
+        error = f"user {user_id}: {str(e) or type(e).__name__}"
+    return {
+        "started": started,
+        "finished": time.time(),
+        "latencies": latencies,
+        "error": error,
+    }
+
+
+def warm_up(base_url, timeout):
+    # Load the page once so the server has compiled the script, imported its
+    # modules, created the schema and taken its first reporting snapshot
+    with connect(stream_url(base_url), subprotocols=["streamlit"],
+                 max_size=None, open_timeout=timeout) as ws:
+        Session(ws, base_url, timeout).run()
+
+
+def seed_assessment(db_path, username):
+    # Give exports rows to return before this run's saves reach the snapshot;
+    # the app must have created its schema already
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        INSERT INTO assessments
+        (user_id, customer_name, is_new_customer, credit_history, income_stability,
+         location, banking_access, referral, credit_score, risk_category, recommended_products)
+        SELECT id, 'Load Test Seed', 0, 5, 5, 5, 5, 5, 5.0, 'Medium Risk', 'Mid Value Products'
+        FROM users WHERE username = ?
+    """, (username,))
+    conn.commit()
+    conn.close()
+
+
+# Reporting
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(results, db_stats):
+    latencies = [t for r in results for t in r["latencies"]]
+    write_latencies = db_stats["write_latencies"]
+    elapsed = max(r["finished"] for r in results) - min(r["started"] for r in results)
+    return {
+        "sessions": len(results),
+        "reruns": len(latencies),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+        "writes": len(write_latencies),
+        "write_p95_ms": percentile(write_latencies, 95) * 1000,
+        "write_max_ms": max(write_latencies, default=0.0) * 1000,
+        "write_total_ms": sum(write_latencies) * 1000,
+        "locked_errors": db_stats["locked_errors"],
+    }
+
+
+def check_budgets(report, args):
+    failures = []
+    if report["p95_ms"] > args.max_p95_ms:
+        failures.append(f"p95 rerun latency {report['p95_ms']:.1f} ms > {args.max_p95_ms} ms")
+    if report["p99_ms"] > args.max_p99_ms:
+        failures.append(f"p99 rerun latency {report['p99_ms']:.1f} ms > {args.max_p99_ms} ms")
+    if report["throughput_rps"] < args.min_throughput:
+        failures.append(f"throughput {report['throughput_rps']:.1f} reruns/s < {args.min_throughput} reruns/s")
+    if report["write_p95_ms"] > args.max_write_latency_ms:
+        failures.append(f"p95 DB write latency {report['write_p95_ms']:.1f} ms > {args.max_write_latency_ms} ms")
+    if report["locked_errors"] > 0:
+        failures.append(f"{report['locked_errors']} 'database is locked' errors")
+    return failures
+
+
+def print_report(report):
+    print("Load test results (one server process)")
+    print(f"  Sessions:        {report['sessions']}")
+    print(f"  Reruns:          {report['reruns']} in {report['elapsed_s']:.2f} s")
+    print(f"  Throughput:      {report['throughput_rps']:.1f} reruns/s")
+    print(f"  Rerun latency:   p50 {report['p50_ms']:.1f} ms | p95 {report['p95_ms']:.1f} ms | "
+          f"p99 {report['p99_ms']:.1f} ms | max {report['max_ms']:.1f} ms")
+    print(f"  DB writes:       {report['writes']} | p95 {report['write_p95_ms']:.1f} ms | "
+          f"max {report['write_max_ms']:.1f} ms | total {report['write_total_ms']:.1f} ms")
+    print(f"  Locked errors:   {report['locked_errors']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Credit Score App")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent simulated users")
+    parser.add_argument("--assessments", type=int, default=3, help="Assessments saved per user")
+    parser.add_argument("--bad-logins", type=int, default=0, help="Failed login attempts per user before logging in")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--db", help="Database file to use (default: a fresh temporary database)")
+    parser.add_argument("--port", type=int, help="Port for the app server (default: a free port)")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-rerun timeout in seconds")
+    parser.add_argument("--snapshot-interval", type=int, default=5, help="Reporting snapshot refresh interval in seconds")
+    parser.add_argument("--max-p95-ms", type=float, default=500, help="Budget for p95 rerun latency")
+    parser.add_argument("--max-p99-ms", type=float, default=1000, help="Budget for p99 rerun latency")
+    parser.add_argument("--min-throughput", type=float, default=5, help="Budget for reruns per second")
+    parser.add_argument("--max-write-latency-ms", type=float, default=100,
+                        help="Budget for p95 DB write/commit latency")
+    args = parser.parse_args(argv)
+    if args.snapshot_interval < 1:
+        parser.error("--snapshot-interval must be at least 1")
+    # login_page locks a session out after 3 failed attempts
+    if not 0 <= args.bad_logins < 3:
+        parser.error("--bad-logins must be between 0 and 2")
+    return args
+
+
+def run_users(args, base_url):
+    start_barrier = threading.Barrier(args.users)
+    results = [None] * args.users
+
+    def run_user(i):
+        results[i] = simulate_user(i, args, base_url, start_barrier)
+
+    threads = [threading.Thread(target=run_user, args=(i,)) for i in range(args.users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Never load test against the live database unless asked to
+    tmpdir = tempfile.TemporaryDirectory()
+    db_path = args.db or os.path.join(tmpdir.name, "credit_app.db")
+    stats_path = os.path.join(tmpdir.name, "db_stats.json")
+    log_path = os.path.join(tmpdir.name, "server.log")
+    os.environ["CREDIT_APP_DB"] = db_path
+    os.environ["CREDIT_APP_REPORT_DB"] = os.path.join(tmpdir.name, "credit_app_report.db")
+    # Refresh the reporting snapshot often enough that exports see this run's saves
+    os.environ["CREDIT_APP_SNAPSHOT_INTERVAL"] = str(args.snapshot_interval)
+
+    port = args.port or free_port()
+    try:
+        # A throwaway server lets the app create its schema; the seeded row is
+        # then in the snapshot the measured server takes when it starts
+        with app_server(port, os.path.join(tmpdir.name, "setup_stats.json"), log_path, args.timeout):
+            pass
+        seed_assessment(db_path, args.username)
+
+        with app_server(port, stats_path, log_path, args.timeout) as base_url:
+            results = run_users(args, base_url)
+
+        with open(stats_path) as f:
+            db_stats = json.load(f)
+    finally:
+        tmpdir.cleanup()
+
+    report = summarize(results, db_stats)
+    print_report(report)
+
+    failures = check_budgets(report, args)
+    failures.extend(f"session error: {r['error']}" for r in results if r["error"])
+
+    if failures:
+        print("\nFAILED")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\nPASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
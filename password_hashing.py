@@ -0,0 +1,204 @@
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Salted, tunable password hashing.
+#
+# Hashes are stored as "<algorithm>$<cost>$<salt>$<key>" so each one carries
+# the cost it was made with; raising the cost only affects new hashes and
+# rehashes. scrypt is used where hashlib provides it, PBKDF2-SHA256 otherwise.
+# The cost is the scrypt N (a power of two) or the PBKDF2 iteration count.
+# Legacy hashes (unsalted SHA-256 hex) still verify and should be rehashed.
+#
+#   python password_hashing.py calibrate --target-ms 100
+#   python password_hashing.py benchmark --threads 8
+
+SCRYPT = "scrypt"
+PBKDF2 = "pbkdf2_sha256"
+
+ALGORITHM = SCRYPT if hasattr(hashlib, "scrypt") else PBKDF2
+
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+# hashlib rejects scrypt maxmem and PBKDF2 iteration counts above INT_MAX
+INT_MAX = 2 ** 31 - 1
+
+
+def _scrypt_maxmem(cost):
+    # scrypt needs 128 * N * r * p bytes; allow that plus headroom
+    return 128 * cost * SCRYPT_R * SCRYPT_P + 1024 * 1024
+
+
+_MAX_SCRYPT_BLOCKS = (INT_MAX - _scrypt_maxmem(0)) // (128 * SCRYPT_R * SCRYPT_P)
+
+DEFAULT_COST = {SCRYPT: 2 ** 14, PBKDF2: 600_000}
+MIN_COST = {SCRYPT: 2 ** 10, PBKDF2: 10_000}
+# Largest power of two whose maxmem hashlib still accepts
+MAX_COST = {SCRYPT: 1 << (_MAX_SCRYPT_BLOCKS.bit_length() - 1), PBKDF2: INT_MAX}
+
+
+def _parse_cost(value, algorithm):
+    try:
+        cost = int(value)
+    except ValueError:
+        raise ValueError(f"CREDIT_APP_HASH_COST must be an integer, got {value!r}") from None
+    if cost < MIN_COST[algorithm]:
+        raise ValueError(f"CREDIT_APP_HASH_COST must be at least {MIN_COST[algorithm]} for {algorithm}, got {cost}")
+    if cost > MAX_COST[algorithm]:
+        raise ValueError(f"CREDIT_APP_HASH_COST must be at most {MAX_COST[algorithm]} for {algorithm}, got {cost}")
+    if algorithm == SCRYPT and cost & (cost - 1):
+        raise ValueError(f"CREDIT_APP_HASH_COST must be a power of two for {algorithm}, got {cost}")
+    return cost
+
+
+# Set from `calibrate` output for this host
+HASH_COST = _parse_cost(os.environ.get("CREDIT_APP_HASH_COST", DEFAULT_COST[ALGORITHM]), ALGORITHM)
+
+
+def _b64encode(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def _b64decode(text):
+    return base64.b64decode(text.encode("ascii"))
+
+
+def _derive(password, salt, algorithm, cost):
+    if algorithm == SCRYPT:
+        return hashlib.scrypt(password.encode(), salt=salt, n=cost, r=SCRYPT_R,
+                              p=SCRYPT_P, maxmem=_scrypt_maxmem(cost), dklen=KEY_BYTES)
+    if algorithm == PBKDF2:
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, cost, dklen=KEY_BYTES)
+    raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+
+
+def _is_legacy(hashed_password):
+    return "$" not in hashed_password
+
+
+def hash_password(password, cost=None, algorithm=ALGORITHM):
+    cost = cost or HASH_COST
+    salt = os.urandom(SALT_BYTES)
+    key = _derive(password, salt, algorithm, cost)
+    return f"{algorithm}${cost}${_b64encode(salt)}${_b64encode(key)}"
+
+
+def verify_password(password, hashed_password):
+    if _is_legacy(hashed_password):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, hashed_password)
+
+    try:
+        algorithm, cost, salt, key = hashed_password.split("$")
+        expected = _b64decode(key)
+        actual = _derive(password, _b64decode(salt), algorithm, int(cost))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+# Verified against when a username doesn't exist, so unknown users cost the
+# same as real ones and login timing doesn't reveal which usernames exist
+DUMMY_HASH = hash_password("no-such-user")
+
+
+def needs_rehash(hashed_password):
+    # True for legacy hashes and hashes made with another algorithm or cost
+    if _is_legacy(hashed_password):
+        return True
+    algorithm, cost = hashed_password.split("$")[:2]
+    return algorithm != ALGORITHM or int(cost) != HASH_COST
+
+
+# Calibration and benchmarking
+def time_verify(cost, algorithm=ALGORITHM, rounds=3):
+    hashed = hash_password("calibration-password", cost, algorithm)
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        verify_password("calibration-password", hashed)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def calibrate(target_ms, algorithm=ALGORITHM):
+    # Largest cost whose verification stays within the target on this host,
+    # up to the largest cost hashlib accepts
+    cost = MIN_COST[algorithm]
+    elapsed = time_verify(cost, algorithm)
+    while True:
+        next_cost = cost * 2
+        if next_cost > MAX_COST[algorithm]:
+            return cost, elapsed
+        next_elapsed = time_verify(next_cost, algorithm)
+        if next_elapsed * 1000 > target_ms:
+            return cost, elapsed
+        cost, elapsed = next_cost, next_elapsed
+
+
+def benchmark(cost, threads, seconds, algorithm=ALGORITHM):
+    # Concurrent verifications, as at peak sign-in, at the given cost
+    hashed = hash_password("benchmark-password", cost, algorithm)
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        latencies = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            verify_password("benchmark-password", hashed)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(worker) for _ in range(threads)]
+        latencies = sorted(t for f in futures for t in f.result())
+    elapsed = time.perf_counter() - start
+
+    return {
+        "logins": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Password hashing cost tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    calibrate_parser = commands.add_parser("calibrate", help="Pick the cost for a target verification time")
+    calibrate_parser.add_argument("--target-ms", type=float, default=100, help="Target time per verification")
+
+    benchmark_parser = commands.add_parser("benchmark", help="Measure login throughput at a cost")
+    benchmark_parser.add_argument("--cost", type=int, default=HASH_COST, help="Cost to benchmark (default: current)")
+    benchmark_parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Concurrent logins")
+    benchmark_parser.add_argument("--seconds", type=float, default=5, help="Benchmark duration")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "calibrate":
+        cost, elapsed = calibrate(args.target_ms)
+        print(f"Algorithm: {ALGORITHM}")
+        print(f"Cost {cost} verifies in {elapsed * 1000:.1f} ms (target {args.target_ms:.0f} ms)")
+        print(f"\nexport CREDIT_APP_HASH_COST={cost}")
+    else:
+        result = benchmark(args.cost, args.threads, args.seconds)
+        print(f"Algorithm: {ALGORITHM}, cost {args.cost}, {args.threads} concurrent logins")
+        print(f"  Logins:      {result['logins']} in {args.seconds:.0f} s")
+        print(f"  Throughput:  {result['throughput']:.1f} logins/s")
+        print(f"  Latency:     p50 {result['p50_ms']:.1f} ms | p95 {result['p95_ms']:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import pytest
+
+import load_test
+
+
+BUDGETS = SimpleNamespace(max_p95_ms=500, max_p99_ms=1000, min_throughput=5, max_write_latency_ms=100)
+
+
+def passing_report(**overrides):
+    report = {
+        "p95_ms": 100.0,
+        "p99_ms": 200.0,
+        "throughput_rps": 20.0,
+        "write_p95_ms": 5.0,
+        "locked_errors": 0,
+    }
+    report.update(overrides)
+    return report
+
+
+def test_percentile_of_empty_input_is_zero():
+    assert load_test.percentile([], 95) == 0.0
+
+
+def test_percentile_of_one_value_is_that_value():
+    for pct in (0, 50, 95, 99, 100):
+        assert load_test.percentile([0.25], pct) == 0.25
+
+
+def test_percentile_picks_nearest_rank():
+    values = [i / 100 for i in range(1, 101)]
+    assert load_test.percentile(values, 0) == 0.01
+    assert load_test.percentile(values, 50) == pytest.approx(0.51)
+    assert load_test.percentile(values, 100) == 1.0
+    assert load_test.percentile(list(reversed(values)), 100) == 1.0
+
+
+def test_summarize():
+    results = [
+        {"started": 10.0, "finished": 12.0, "latencies": [0.1, 0.2]},
+        {"started": 11.0, "finished": 14.0, "latencies": [0.3, 0.4]},
+    ]
+    report = load_test.summarize(results, {"write_latencies": [0.002, 0.004], "locked_errors": 1})
+    assert report["sessions"] == 2
+    assert report["reruns"] == 4
+    assert report["elapsed_s"] == 4.0
+    assert report["throughput_rps"] == 1.0
+    assert report["max_ms"] == pytest.approx(400)
+    assert report["writes"] == 2
+    assert report["write_total_ms"] == pytest.approx(6)
+    assert report["locked_errors"] == 1
+
+
+def test_summarize_without_writes():
+    results = [{"started": 0.0, "finished": 1.0, "latencies": []}]
+    report = load_test.summarize(results, {"write_latencies": [], "locked_errors": 0})
+    assert report["throughput_rps"] == 0.0
+    assert report["write_p95_ms"] == 0.0
+
+
+def test_within_budgets_passes():
+    assert load_test.check_budgets(passing_report(), BUDGETS) == []
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"p95_ms": 600.0}, "p95 rerun latency 600.0 ms > 500 ms"),
+    ({"p99_ms": 1500.0}, "p99 rerun latency 1500.0 ms > 1000 ms"),
+    ({"throughput_rps": 2.0}, "throughput 2.0 reruns/s < 5 reruns/s"),
+    ({"write_p95_ms": 150.0}, "p95 DB write latency 150.0 ms > 100 ms"),
+    ({"locked_errors": 3}, "3 'database is locked' errors"),
+])
+def test_each_budget_failure(overrides, message):
+    assert load_test.check_budgets(passing_report(**overrides), BUDGETS) == [message]
+
+
+def test_budgets_are_inclusive():
+    report = passing_report(p95_ms=500.0, p99_ms=1000.0, throughput_rps=5.0, write_p95_ms=100.0)
+    assert load_test.check_budgets(report, BUDGETS) == []
+
+
+@pytest.mark.parametrize("bad_logins", ["-1", "3", "5"])
+def test_bad_logins_out_of_range_is_rejected(bad_logins):
+    with pytest.raises(SystemExit):
+        load_test.parse_args(["--bad-logins", bad_logins])
@@ -0,0 +1,122 @@
+import hashlib
+import sqlite3
+
+import pytest
+
+import password_hashing as ph
+
+
+def legacy_hash(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def test_hash_round_trip():
+    hashed = ph.hash_password("correct horse")
+    assert hashed.startswith(f"{ph.ALGORITHM}${ph.HASH_COST}$")
+    assert ph.verify_password("correct horse", hashed)
+    assert not ph.needs_rehash(hashed)
+
+
+def test_hashes_are_salted():
+    assert ph.hash_password("correct horse") != ph.hash_password("correct horse")
+
+
+def test_wrong_password():
+    hashed = ph.hash_password("correct horse")
+    assert not ph.verify_password("battery staple", hashed)
+    assert not ph.verify_password("battery staple", legacy_hash("correct horse"))
+
+
+def test_legacy_hash_verifies_and_needs_rehash():
+    hashed = legacy_hash("admin123")
+    assert ph.verify_password("admin123", hashed)
+    assert ph.needs_rehash(hashed)
+
+
+@pytest.mark.parametrize("hashed", [
+    "",
+    "garbage$x",
+    "scrypt$16384$not-base64!$not-base64!",
+    "md5$1000$c2FsdA==$a2V5",
+    "scrypt$3$c2FsdA==$a2V5",
+    "scrypt$many$c2FsdA==$a2V5",
+    "scrypt$16384$c2FsdA==$a2V5$extra",
+])
+def test_malformed_hash_does_not_verify(hashed):
+    assert not ph.verify_password("admin123", hashed)
+
+
+def test_needs_rehash_after_cost_change(monkeypatch):
+    hashed = ph.hash_password("correct horse")
+    monkeypatch.setattr(ph, "HASH_COST", ph.HASH_COST * 2)
+    assert ph.needs_rehash(hashed)
+    assert ph.verify_password("correct horse", hashed)
+
+
+def test_needs_rehash_after_algorithm_change():
+    hashed = ph.hash_password("correct horse", ph.MIN_COST[ph.PBKDF2], ph.PBKDF2)
+    assert ph.verify_password("correct horse", hashed)
+    assert ph.needs_rehash(hashed) == (ph.ALGORITHM != ph.PBKDF2)
+
+
+def test_calibrate_returns_min_cost_when_target_unreachable(monkeypatch):
+    monkeypatch.setattr(ph, "time_verify", lambda cost, algorithm=ph.ALGORITHM: 1.0)
+    cost, elapsed = ph.calibrate(target_ms=1)
+    assert cost == ph.MIN_COST[ph.ALGORITHM]
+    assert elapsed == 1.0
+
+
+def test_calibrate_doubles_cost_up_to_target(monkeypatch):
+    # Pretend verification takes 1 ms per MIN_COST unit of cost
+    min_cost = ph.MIN_COST[ph.ALGORITHM]
+    monkeypatch.setattr(ph, "time_verify", lambda cost, algorithm=ph.ALGORITHM: cost / min_cost / 1000)
+    cost, elapsed = ph.calibrate(target_ms=10)
+    assert cost == min_cost * 8
+    assert elapsed == pytest.approx(0.008)
+
+
+def test_calibrate_stops_at_max_cost(monkeypatch):
+    # Even when every cost is within the target, never pick one hashlib rejects
+    monkeypatch.setattr(ph, "time_verify", lambda cost, algorithm=ph.ALGORITHM: 0.0)
+    cost, elapsed = ph.calibrate(target_ms=1000)
+    assert cost == ph.MAX_COST[ph.ALGORITHM]
+
+
+def test_max_scrypt_cost_fits_hashlib_maxmem():
+    assert ph._scrypt_maxmem(ph.MAX_COST[ph.SCRYPT]) <= ph.INT_MAX
+    assert ph._scrypt_maxmem(ph.MAX_COST[ph.SCRYPT] * 2) > ph.INT_MAX
+
+
+@pytest.mark.parametrize("value", ["abc", "100000", "512", str(2 ** 21)])
+def test_invalid_scrypt_cost_is_rejected(value):
+    with pytest.raises(ValueError, match="CREDIT_APP_HASH_COST"):
+        ph._parse_cost(value, ph.SCRYPT)
+
+
+def test_invalid_pbkdf2_cost_is_rejected():
+    with pytest.raises(ValueError, match="at least"):
+        ph._parse_cost("1000", ph.PBKDF2)
+    assert ph._parse_cost("100000", ph.PBKDF2) == 100000
+
+
+def test_legacy_hash_upgraded_on_login(tmp_path, monkeypatch):
+    AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+    db_path = tmp_path / "credit_app.db"
+    monkeypatch.setenv("CREDIT_APP_DB", str(db_path))
+
+    at = AppTest.from_file("app.py.py")
+    at.run()
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE users SET password_hash = ? WHERE username = 'admin'", (legacy_hash("admin123"),))
+    conn.commit()
+
+    at.text_input[0].input("admin")
+    at.text_input[1].input("admin123")
+    at.button[0].click()
+    at.run()
+
+    assert "user" in at.session_state
+    upgraded = conn.execute("SELECT password_hash FROM users WHERE username = 'admin'").fetchone()[0]
+    conn.close()
+    assert not ph.needs_rehash(upgraded)
+    assert ph.verify_password("admin123", upgraded)